@@ -1,14 +1,101 @@
-﻿import json
-import csv
+﻿import argparse
+import functools
+import json
+import logging
 import math
+import shutil
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyproj
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; write_czml falls back to the json module
+    orjson = None
+
+log = logging.getLogger(__name__)
 
 
 # WGS84 ellipsoid constants are no longer needed as we use pyproj for transformations
 
 # We'll initialize our transformers dynamically based on the first lat/long in the data
 
+# CSV columns converted to floats (missing or malformed values become NaN)
+NUMERIC_COLUMNS = (
+    'Latitude', 'Longitude', 'UTM_X', 'UTM_Y', 'Depth', 'Heading', 'Pitch', 'Roll',
+    'O2_Concentration', 'Temperature', 'Salinity', 'Pressure'
+)
+
+# CSV columns kept as strings (missing values become "")
+TEXT_COLUMNS = (
+    'Timestamp', 'sensor_name', 'event_value', 'event_free_text',
+    'vehicleRealtimeDualHDGrabData.filename_2_value'
+)
+
+# RGBA colors shared by every packet (tuples, so the shared objects can't be mutated)
+WHITE_RGBA = (255, 255, 255, 255)
+BLACK_RGBA = (0, 0, 0, 255)
+CYAN_RGBA = (0, 255, 255, 255)
+
+# Billboard (rgba, scale) per event type; other event types use DEFAULT_EVENT_STYLE
+EVENT_STYLES = {
+    "FREE_FORM": ((0, 100, 0, 179), 0.5),
+    "HIGHLIGHT": ((184, 134, 11, 179), 0.6),
+}
+DEFAULT_EVENT_STYLE = ((255, 255, 255, 179), 0.5)
+
+# Invariant parts of the sensor/event packets, built once and shared by every
+# packet. Fields set to None are filled in per packet with {**TEMPLATE, ...};
+# overriding keeps the key order of the template. Nothing mutates these.
+HERCULES_POSITION_REF = {"reference": "Hercules#position"}
+EVENT_DISPLAY_CONDITION = {"distanceDisplayCondition": [100, 9999999]}
+
+EVENT_BILLBOARD_TEMPLATE = {
+    "scale": None,
+    "horizontalOrigin": "RIGHT",
+    "eyeOffset": {"cartesian": [0, 0, 0]},
+    "image": None,
+    "show": True,
+    "pixelOffset": {"cartesian2": [0, 0]},
+    "verticalOrigin": "CENTER",
+    "distanceDisplayCondition": EVENT_DISPLAY_CONDITION,
+    "disableDepthTestDistance": 9999999999,
+    "color": None
+}
+
+EVENT_LABEL_TEMPLATE = {
+    "style": "FILL_AND_OUTLINE",
+    "scale": 0.5,
+    "horizontalOrigin": "LEFT",
+    "show": True,
+    "text": None,
+    "disableDepthTestDistance": 9999999999,
+    "pixelOffset": {"cartesian2": [5, -50]},
+    "fillColor": {"rgba": WHITE_RGBA},
+    "verticalOrigin": "CENTER",
+    "font": "bold 15pt Calibri",
+    "distanceDisplayCondition": EVENT_DISPLAY_CONDITION,
+    "outlineWidth": 2,
+    "outlineColor": {"rgba": BLACK_RGBA}
+}
+
+# ISO8601 format used by the ROV timestamps and the CZML availability strings
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Strips ':' and '-' and turns 'T' into '_' in one pass, for packet ids
+# (2023-11-01T19:07:12Z -> 20231101_190712Z)
+SAFE_TIME_TABLE = str.maketrans({':': None, '-': None, 'T': '_'})
+
+# Quaternion [x, y, z, w] with no rotation
+IDENTITY_QUATERNION = np.array([0.0, 0.0, 0.0, 1.0])
+
+# Output buffer for write_czml; coalesces the many small sensor and event
+# packet writes into large chunks instead of one write() per 8 KiB
+WRITE_BUFFER_SIZE = 1 << 20
+
 def parse_csv(file_path):
     """
     Parse a CSV containing ROV data, converting numeric fields to floats.
@@ -18,54 +105,90 @@ def parse_csv(file_path):
       - UTM_X, UTM_Y, Depth, Heading, Pitch, Roll
       - O2_Concentration, Temperature, Salinity, Pressure
 
+    Only the columns listed in NUMERIC_COLUMNS and TEXT_COLUMNS are loaded,
+    straight into one contiguous array per column by pandas' C reader.
+
     Returns:
-      List[dict]: Each row from the CSV as a dictionary.
+      pandas.DataFrame: One column per loaded CSV column. Numeric columns are
+      float64 (missing or malformed values become NaN); text columns are str
+      (missing values become ""). Empty if the CSV could not be read.
     
     Reference: While CZML doesn't define CSV structure, this function provides the data
     that will be converted to CZML per the CZML Guide:
     https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide
     """
-    rows = []
     file_path = Path(file_path)
     if not file_path.exists():
-        print(f"Error: CSV not found at {file_path}")
-        return rows
+        log.error("Error: CSV not found at %s", file_path)
+        return pd.DataFrame()
 
     try:
-        with file_path.open('r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Convert numeric fields to float
-                for key in [
-                    'Latitude', 'Longitude', 'UTM_X', 'UTM_Y', 'Depth', 'Heading', 'Pitch', 'Roll',
-                    'O2_Concentration', 'Temperature', 'Salinity', 'Pressure'
-                ]:
-                    if key in row:
-                        try:
-                            row[key] = float(row[key]) if row[key] else None
-                        except ValueError:
-                            row[key] = None
-                rows.append(row)
-        print(f"Successfully loaded {len(rows)} rows from {file_path}")
+        df = pd.read_csv(
+            file_path,
+            usecols=lambda name: name in NUMERIC_COLUMNS or name in TEXT_COLUMNS,
+            dtype={key: str for key in TEXT_COLUMNS},
+            keep_default_na=False,
+            na_values={key: [''] for key in NUMERIC_COLUMNS}
+        )
+        # Malformed numeric cells leave the column as strings; coerce them to NaN
+        for key in NUMERIC_COLUMNS:
+            if key in df and df[key].dtype.kind != 'f':
+                df[key] = pd.to_numeric(df[key], errors='coerce').astype(np.float64)
+        log.info("Successfully loaded %d rows from %s", len(df), file_path)
+        return df
     except Exception as ex:
-        print(f"Error reading CSV {file_path}: {ex}")
-    return rows
+        log.error("Error reading CSV %s: %s", file_path, ex)
+        return pd.DataFrame()
 
-def seconds_between(start_time_str, current_time_str):
+def get_column(data, name, default):
     """
-    Compute the difference in seconds between two ISO8601 strings.
-    
-    In CZML, time is typically expressed as seconds relative to an epoch.
-    See: https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide#time
+    Return column `name` of the parse_csv DataFrame as a NumPy array.
+
+    Columns missing from the CSV are filled with `default` for every row.
     """
-    try:
-        fmt = "%Y-%m-%dT%H:%M:%SZ"
-        start = datetime.strptime(start_time_str, fmt)
-        current = datetime.strptime(current_time_str, fmt)
-        return (current - start).total_seconds()
-    except Exception as ex:
-        print(f"Error parsing timestamps: {ex}")
-        return 0
+    if name in data:
+        return data[name].to_numpy()
+    return np.full(len(data), default, dtype=object if isinstance(default, str) else np.float64)
+
+def _has_timestamp_shape(strings):
+    """
+    Check that every non-empty entry of a NumPy str array has the
+    YYYY-mm-ddTHH:MM:SSZ shape (length and separator positions only; NumPy
+    rejects non-digits in the remaining positions itself).
+    """
+    present = strings != ""
+    if not present.any():
+        return True
+    # The array is as wide as its longest value, so any other width rules out the shape
+    if strings.dtype.itemsize != 20 * np.dtype("U1").itemsize:
+        return False
+    chars = strings[present].view("U1").reshape(-1, 20)
+    return bool((np.char.str_len(strings[present]) == 20).all()
+                and (chars[:, [4, 7]] == '-').all() and (chars[:, 10] == 'T').all()
+                and (chars[:, [13, 16]] == ':').all() and (chars[:, 19] == 'Z').all())
+
+def parse_timestamp_column(timestamp_strings):
+    """
+    Parse a sequence of TIMESTAMP_FORMAT strings into a datetime64[s] array.
+
+    Missing values (None or "") become NaT. When every present value has the
+    fixed YYYY-mm-ddTHH:MM:SSZ shape, the trailing 'Z' is dropped and NumPy
+    parses the ISO 8601 text natively. NumPy also accepts other ISO 8601
+    forms (dates without a time, fractional seconds, UTC offsets, "NaT"), so
+    any column with a value of a different shape, or one NumPy rejects, goes
+    through pandas with the exact TIMESTAMP_FORMAT and the bad values are
+    coerced to NaT.
+    """
+    strings = np.asarray(["" if ts is None else ts for ts in timestamp_strings], dtype=str)
+    if _has_timestamp_shape(strings):
+        try:
+            return strings.astype("U19").astype("datetime64[s]")
+        except ValueError:
+            pass
+    return pd.to_datetime(
+        pd.Series(strings, dtype=object).replace("", None),
+        format=TIMESTAMP_FORMAT, errors="coerce", cache=True
+    ).to_numpy(dtype="datetime64[s]")
 
 def get_utm_zone(lat, lon):
     """
@@ -95,11 +218,36 @@ def get_utm_zone(lat, lon):
 
     return math.floor((lon + 180) / 6) + 1
 
+@functools.lru_cache(maxsize=32)
+def make_transformers(utm_zone, hemisphere):
+    """
+    Build the (utm_to_ecef, utm_to_geodetic) pyproj transformers for one UTM zone.
+
+    PROJ pipeline setup is far more expensive than a transform, so the pair is
+    cached per (utm_zone, hemisphere); repeated calls return the same objects.
+    """
+    # Create transformers using pyproj. See pyproj documentation and CZML usage of ECEF:
+    # https://cesium.com/learn/cesiumjs/ref-doc/CoordinateConversion.html
+    utm_to_ecef = pyproj.Transformer.from_crs(
+        f"+proj=utm +zone={utm_zone} +{hemisphere} +datum=WGS84 +units=m +no_defs",
+        "+proj=geocent +datum=WGS84 +units=m +no_defs",
+        always_xy=True
+    )
+
+    utm_to_geodetic = pyproj.Transformer.from_crs(
+        f"+proj=utm +zone={utm_zone} +{hemisphere} +datum=WGS84 +units=m +no_defs",
+        "+proj=longlat +datum=WGS84 +no_defs",
+        always_xy=True
+    )
+
+    return utm_to_ecef, utm_to_geodetic
+
 def initialize_transformers(data):
     """
     Initialize UTM to ECEF transformers based on the first lat/long in the data.
     
-    Returns a tuple of (utm_to_ecef, utm_to_geodetic) transformers using pyproj.
+    Returns a tuple of (utm_to_ecef, utm_to_geodetic) transformers using pyproj
+    (see make_transformers).
     
     The utm_to_ecef transformer is used to convert UTM (with a geoid adjustment)
     to Earth-Centered, Earth-Fixed (ECEF) coordinates, as required by Cesium's
@@ -108,192 +256,123 @@ def initialize_transformers(data):
     The utm_to_geodetic transformer converts UTM to geographic (longlat) coordinates.
     """
     # Find the first valid lat/long
-    for row in data:
-        if row.get('Latitude') is not None and row.get('Longitude') is not None:
-            lat = row['Latitude']
-            lon = row['Longitude']
-
-            # Determine UTM zone
-            utm_zone = get_utm_zone(lat, lon)
-            hemisphere = 'north' if lat >= 0 else 'south'
+    located = ~(np.isnan(get_column(data, 'Latitude', np.nan)) | np.isnan(get_column(data, 'Longitude', np.nan)))
+    if located.any():
+        first = located.argmax()
+        lat = data['Latitude'].iat[first]
+        lon = data['Longitude'].iat[first]
 
-            print(f"Calculated UTM zone: {utm_zone}{hemisphere[0].upper()} for coordinates Lat: {lat}, Lon: {lon}")
+        # Determine UTM zone
+        utm_zone = get_utm_zone(lat, lon)
+        hemisphere = 'north' if lat >= 0 else 'south'
 
-            # Create transformers using pyproj. See pyproj documentation and CZML usage of ECEF:
-            # https://cesium.com/learn/cesiumjs/ref-doc/CoordinateConversion.html
-            utm_to_ecef = pyproj.Transformer.from_crs(
-                f"+proj=utm +zone={utm_zone} +{hemisphere} +datum=WGS84 +units=m +no_defs",
-                "+proj=geocent +datum=WGS84 +units=m +no_defs",
-                always_xy=True
-            )
+        log.info("Calculated UTM zone: %d%s for coordinates Lat: %s, Lon: %s",
+                 utm_zone, hemisphere[0].upper(), lat, lon)
 
-            utm_to_geodetic = pyproj.Transformer.from_crs(
-                f"+proj=utm +zone={utm_zone} +{hemisphere} +datum=WGS84 +units=m +no_defs",
-                "+proj=longlat +datum=WGS84 +no_defs",
-                always_xy=True
-            )
-
-            return utm_to_ecef, utm_to_geodetic
+        return make_transformers(utm_zone, hemisphere)
 
     # Default to UTM zone 4N if no valid lat/long found
-    print("Warning: No valid latitude/longitude found. Defaulting to UTM zone 4N.")
-    utm_to_ecef = pyproj.Transformer.from_crs(
-        "+proj=utm +zone=4 +north +datum=WGS84 +units=m +no_defs",
-        "+proj=geocent +datum=WGS84 +units=m +no_defs",
-        always_xy=True
-    )
-
-    utm_to_geodetic = pyproj.Transformer.from_crs(
-        "+proj=utm +zone=4 +north +datum=WGS84 +units=m +no_defs",
-        "+proj=longlat +datum=WGS84 +no_defs",
-        always_xy=True
-    )
-
-    return utm_to_ecef, utm_to_geodetic
+    log.warning("Warning: No valid latitude/longitude found. Defaulting to UTM zone 4N.")
+    return make_transformers(4, 'north')
 
 def utm_to_cartesian(utm_x, utm_y, depth, utm_to_ecef_transformer):
     """
     Convert UTM coordinates and depth to ECEF Cartesian coordinates.
 
     Args:
-      utm_x: Easting coordinate in UTM (meters)
-      utm_y: Northing coordinate in UTM (meters)
-      depth: Depth below sea level (already negative values) in meters
+      utm_x: Easting coordinates in UTM (meters), array of length N
+      utm_y: Northing coordinates in UTM (meters), array of length N
+      depth: Depths below sea level (already negative values) in meters, array of length N
       utm_to_ecef_transformer: Transformer for UTM to ECEF conversion
 
     Returns:
-      List of [x, y, z] coordinates in ECEF.
+      Array of shape (N, 3) holding the [x, y, z] coordinates in ECEF.
     
     Note: Depth is adjusted by a fixed geoid height (approx -30 m) to obtain
     an ellipsoidal height, as expected by the transformation.
     """
     # Adjust depth to an ellipsoidal height (MSL to ellipsoid correction)
-    ellipsoidal_height = depth - 30.0  # Depth is negative, so subtracting makes it more negative
+    ellipsoidal_height = np.asarray(depth, dtype=np.float64) - 30.0  # Depth is negative, so subtracting makes it more negative
 
-    # Convert from UTM to ECEF using the transformer
+    # Convert from UTM to ECEF using the transformer (one call for the whole array)
     x, y, z = utm_to_ecef_transformer.transform(utm_x, utm_y, ellipsoidal_height)
-    return [x, y, z]
+    return np.column_stack([x, y, z])
 
-def enu_to_ecef_matrix(utm_x, utm_y, utm_to_geodetic_transformer):
+def enu_to_ecef_quaternion(utm_x, utm_y, utm_to_geodetic_transformer):
     """
-    Compute the rotation matrix from the local ENU coordinate system
-    to the ECEF coordinate system for given UTM coordinates.
+    Compute the ENU to ECEF rotation directly as quaternions [x, y, z, w],
+    shape (N, 4), for arrays of UTM coordinates.
 
-    Returns a 3x3 rotation matrix as a list of 3 column vectors (not row vectors).
+    The rotation whose columns are the local East, North and Up vectors is
+    Rz(lon + 90°) * Rx(90° - lat), so its quaternion is the product of those
+    two axis rotations in closed form; no matrices are built. The result is
+    continuous away from ±180° longitude, where q flips sign to -q (the same
+    rotation).
 
-    This matrix is used to transform orientation quaternions from the local ENU
-    frame to the ECEF frame, as needed for the CesiumJS Orientation property:
-    https://cesium.com/learn/cesiumjs/ref-doc/Orientation.html
+    Reference: https://cesium.com/learn/cesiumjs/ref-doc/Transforms.html#.eastNorthUpToFixedFrame
     """
     # Convert UTM to geodetic (longitude/latitude)
     lon_deg, lat_deg = utm_to_geodetic_transformer.transform(utm_x, utm_y)
-    lon_rad = math.radians(lon_deg)
-    lat_rad = math.radians(lat_deg)
-
-    # Compute sine and cosine for latitude and longitude
-    sinLon = math.sin(lon_rad)
-    cosLon = math.cos(lon_rad)
-    sinLat = math.sin(lat_rad)
-    cosLat = math.cos(lat_rad)
-
-    # Compute column vectors for the ENU to ECEF rotation matrix
-    # East vector
-    col1 = [-sinLon, -sinLat * cosLon, cosLat * cosLon]
-    # North vector
-    col2 = [cosLon, -sinLat * sinLon, cosLat * sinLon]
-    # Up vector
-    col3 = [0, cosLat, sinLat]
-
-    return [col1, col2, col3]
-
-def matrix_to_quaternion(m):
-    """
-    Convert a 3x3 rotation matrix (list of 3 lists) to a quaternion [x, y, z, w].
+    half_z = np.radians(np.asarray(lon_deg) + 90.0) * 0.5
+    half_x = np.radians(90.0 - np.asarray(lat_deg)) * 0.5
 
-    This is used to convert the ENU to ECEF rotation matrix into a quaternion
-    that can be assigned to the CZML 'orientation' property.
-    Reference: https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide#orientation
-    """
-    trace = m[0][0] + m[1][1] + m[2][2]
-    if trace > 0:
-        s = math.sqrt(trace + 1.0) * 2  # s = 4 * qw
-        qw = 0.25 * s
-        qx = (m[2][1] - m[1][2]) / s
-        qy = (m[0][2] - m[2][0]) / s
-        qz = (m[1][0] - m[0][1]) / s
-    elif (m[0][0] > m[1][1]) and (m[0][0] > m[2][2]):
-        s = math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2]) * 2  # s = 4 * qx
-        qw = (m[2][1] - m[1][2]) / s
-        qx = 0.25 * s
-        qy = (m[0][1] + m[1][0]) / s
-        qz = (m[0][2] + m[2][0]) / s
-    elif m[1][1] > m[2][2]:
-        s = math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2]) * 2  # s = 4 * qy
-        qw = (m[0][2] - m[2][0]) / s
-        qx = (m[0][1] + m[1][0]) / s
-        qy = 0.25 * s
-        qz = (m[1][2] + m[2][1]) / s
-    else:
-        s = math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1]) * 2  # s = 4 * qz
-        qw = (m[1][0] - m[0][1]) / s
-        qx = (m[0][2] + m[2][0]) / s
-        qy = (m[1][2] + m[2][1]) / s
-        qz = 0.25 * s
-    return [qx, qy, qz, qw]
+    sz, cz = np.sin(half_z), np.cos(half_z)
+    sx, cx = np.sin(half_x), np.cos(half_x)
+    return np.stack([cz * sx, sz * sx, sz * cx, cz * cx], axis=-1)
 
 def quaternion_multiply(q1, q2):
     """
-    Multiply two quaternions.
-    q1 and q2 are lists [x, y, z, w].
-    Returns their product as [x, y, z, w].
+    Multiply two quaternions (or arrays of quaternions) element-wise.
+    q1 and q2 are [x, y, z, w] or arrays of shape (N, 4); a single quaternion
+    is broadcast against an array.
+    Returns their product as [x, y, z, w] (shape (N, 4) for array input).
 
     This is needed to combine rotations (e.g. model correction and ENU-to-ECEF transform).
     """
-    x1, y1, z1, w1 = q1
-    x2, y2, z2, w2 = q2
+    q1 = np.asarray(q1, dtype=np.float64)
+    q2 = np.asarray(q2, dtype=np.float64)
+    x1, y1, z1, w1 = q1[..., 0], q1[..., 1], q1[..., 2], q1[..., 3]
+    x2, y2, z2, w2 = q2[..., 0], q2[..., 1], q2[..., 2], q2[..., 3]
     x = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
     y = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
     z = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
     w = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
-    return [x, y, z, w]
+    return np.stack(np.broadcast_arrays(x, y, z, w), axis=-1)
 
 def quaternion_conjugate(q):
     """
-    Returns the conjugate of a quaternion [x, y, z, w].
+    Returns the conjugate of a quaternion [x, y, z, w] (or an array of shape (N, 4)).
 
     Conjugation is used in quaternion operations such as inversion.
     """
-    x, y, z, w = q
-    return [-x, -y, -z, w]
+    return np.asarray(q, dtype=np.float64) * [-1.0, -1.0, -1.0, 1.0]
 
 def euler_to_quaternion(heading_deg, pitch_deg, roll_deg):
     """
-    Convert Euler angles in degrees to a quaternion.
+    Convert Euler angles in degrees to quaternions.
     - Heading (yaw) is measured clockwise from North.
     - Pitch is positive nose up.
     - Roll is positive right side down.
 
-    Returns quaternion as [x, y, z, w].
+    Accepts scalars or arrays of length N and returns quaternions as
+    [x, y, z, w] (shape (N, 4) for array input).
 
     Note: The heading is converted to the ENU (East-North-Up) frame where North=0°,
     as described in the CesiumJS documentation:
     https://cesium.com/learn/cesiumjs/ref-doc/Camera.html
     """
-    # Debug: Print original Euler angles
-    print(f"Original Euler angles: Heading={heading_deg}°, Pitch={pitch_deg}°, Roll={roll_deg}°")
-
     # Convert angles to radians; adjust heading for ENU (North=0°; East=90°)
-    yaw = math.radians((90 - heading_deg) % 360.0)  # Convert from navigation heading to ENU yaw
-    pitch = math.radians(pitch_deg)
-    roll = math.radians(roll_deg)
+    yaw = np.radians((90 - np.asarray(heading_deg, dtype=np.float64)) % 360.0)  # Convert from navigation heading to ENU yaw
+    pitch = np.radians(pitch_deg)
+    roll = np.radians(roll_deg)
 
     # Compute half angles
-    cy = math.cos(yaw * 0.5)
-    sy = math.sin(yaw * 0.5)
-    cp = math.cos(pitch * 0.5)
-    sp = math.sin(pitch * 0.5)
-    cr = math.cos(roll * 0.5)
-    sr = math.sin(roll * 0.5)
+    cy = np.cos(yaw * 0.5)
+    sy = np.sin(yaw * 0.5)
+    cp = np.cos(pitch * 0.5)
+    sp = np.sin(pitch * 0.5)
+    cr = np.cos(roll * 0.5)
+    sr = np.sin(roll * 0.5)
 
     # Compute quaternion components using ZYX rotation order (yaw, pitch, roll)
     qw = cr * cp * cy + sr * sp * sy
@@ -301,9 +380,7 @@ def euler_to_quaternion(heading_deg, pitch_deg, roll_deg):
     qy = cr * sp * cy + sr * cp * sy
     qz = cr * cp * sy - sr * sp * cy
 
-    # Debug: Print resulting local quaternion
-    print(f"Local quaternion: [{qx:.6f}, {qy:.6f}, {qz:.6f}, {qw:.6f}]")
-    return [qx, qy, qz, qw]
+    return np.stack([qx, qy, qz, qw], axis=-1)
 
 def get_precise_model_correction():
     """
@@ -314,12 +391,12 @@ def get_precise_model_correction():
     orientation and any model-specific correction. See CZML orientation documentation:
     https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide#orientation
     """
-    print("Using identity quaternion for model correction (no correction applied)")
-    return [0, 0, 0, 1]  # Identity quaternion (no rotation)
+    log.debug("Using identity quaternion for model correction (no correction applied)")
+    return IDENTITY_QUATERNION.copy()
 
-def build_czml(data):
+def iter_czml_packets(data):
     """
-    Create a list of CZML packets with dynamic orientation.
+    Generate the CZML packets with dynamic orientation, one at a time.
     
     For each row:
       - Convert UTM coordinates and depth to ECEF Cartesian coordinates.
@@ -332,14 +409,22 @@ def build_czml(data):
     CesiumJS uses these CZML packets for dynamic visualization:
     https://cesium.com/learn/cesiumjs/ref-doc/
     """
-    if not data:
-        return []
+    if data.empty:
+        return
 
     # Initialize transformers based on the first lat/long in the data
     utm_to_ecef_transformer, utm_to_geodetic_transformer = initialize_transformers(data)
 
-    start_time = data[0]["Timestamp"]
-    end_time = data[-1]["Timestamp"]
+    timestamp_strings = data["Timestamp"].to_numpy()
+    start_time = timestamp_strings[0]
+    end_time = timestamp_strings[-1]
+
+    # Parse the whole Timestamp column once (unparseable values become NaT).
+    # Offsets from the first row feed the position/orientation samples, and the
+    # +2 s end times feed the sensor/event availability intervals below.
+    timestamps = parse_timestamp_column(timestamp_strings)
+    offsets_all = (timestamps - timestamps[0]) / np.timedelta64(1, "s")
+    end_times = np.datetime_as_string(timestamps + np.timedelta64(2, "s"), unit="s")
 
     # Create the CZML document packet per CZML spec (defines the clock, etc.)
     document_packet = {
@@ -354,127 +439,118 @@ def build_czml(data):
             "step": "SYSTEM_CLOCK_MULTIPLIER"
         }
     }
+    yield document_packet
 
-    position_list = []  # Will hold [time, x, y, z] in ECEF
-    orientation_list = []  # Will hold [time, qx, qy, qz, qw] in ECEF
-
-    prev_heading = None
-    print(f"Processing {len(data)} total data points")
+    log.info("Processing %d total data points", len(data))
 
     # Get the model correction quaternion (currently identity)
     model_correction = get_precise_model_correction()
-    print(f"Using model correction quaternion: {model_correction}")
+    log.debug("Using model correction quaternion: %s", model_correction)
 
     # For the first few rows, print detailed debug info
     debug_detail_limit = 5
 
-    for i, row in enumerate(data):
-        if all(row.get(k) is not None for k in ["Timestamp", "UTM_X", "UTM_Y", "Depth"]):
-            offset_sec = seconds_between(start_time, row["Timestamp"])
-
-            utm_x = row["UTM_X"]
-            utm_y = row["UTM_Y"]
-            depth = row["Depth"]  # Depth is negative below sea level
-
-            # Convert UTM coordinates to ECEF (used for the CZML 'position' property)
-            xyz = utm_to_cartesian(utm_x, utm_y, depth, utm_to_ecef_transformer)
-            position_list.extend([offset_sec] + xyz)
-
-            # For the first 20 rows, force level flight (orientation pointing north)
-            if i < 20:  # Force level flight for initial samples
-                if i < debug_detail_limit:
-                    print(f"\n--- SPECIAL HANDLING FOR ROW {i}: FORCING LEVEL FLIGHT NORTH ---")
-                # Identity quaternion for local north-pointing (no rotation)
-                q_north = [0.0, 0.0, 0.0, 1.0]
-
-                # Compute ENU to ECEF quaternion using the transformation matrix
-                enu_matrix = enu_to_ecef_matrix(utm_x, utm_y, utm_to_geodetic_transformer)
-                q_transform = matrix_to_quaternion(enu_matrix)
-
-                if i < debug_detail_limit:
-                    print(f"Forcing level flight pointing north")
-                    print(f"North-pointing local quaternion: [{q_north[0]:.6f}, {q_north[1]:.6f}, {q_north[2]:.6f}, {q_north[3]:.6f}]")
-                    print(f"ENU to ECEF quaternion: [{q_transform[0]:.6f}, {q_transform[1]:.6f}, {q_transform[2]:.6f}, {q_transform[3]:.6f}]")
-
-                # Transform the local quaternion to the global (ECEF) frame
-                q_global = quaternion_multiply(q_transform, q_north)
-
-                if i < debug_detail_limit:
-                    print(f"Final ECEF quaternion: [{q_global[0]:.6f}, {q_global[1]:.6f}, {q_global[2]:.6f}, {q_global[3]:.6f}]")
-                    print(f"--- END SPECIAL HANDLING FOR ROW {i} ---\n")
-
-                orientation_list.extend([offset_sec] + q_global)
-
-                if i % 5 == 0:
-                    print(f"Row {i}: FORCING Heading=0°, Pitch=0°, Roll=0°, " +
-                          f"Quaternion=[{q_global[0]:.3f}, {q_global[1]:.3f}, {q_global[2]:.3f}, {q_global[3]:.3f}] " +
-                          f"at offset {offset_sec:.2f}s")
-                continue  # Skip the rest for these initial rows
-
-            # Normal processing for remaining rows
-            heading = row.get("Heading")
-            pitch = row.get("Pitch", 0.0)  # Default to 0 if not present
-            roll = row.get("Roll", 0.0)    # Default to 0 if not present
-
-            if heading is not None:
-                try:
-                    heading = float(heading)
-                    pitch = float(pitch)
-                    roll = float(roll)
-
-                    if i < debug_detail_limit:
-                        print(f"\n--- DETAILED DEBUG FOR ROW {i} ---")
-                        print(f"Raw values: Heading={heading}°, Pitch={pitch}°, Roll={roll}°")
-
-                    if prev_heading is not None:
-                        heading_change = abs(heading - prev_heading)
-                        heading_change = min(heading_change, 360 - heading_change)
-                        if heading_change > 30:
-                            print(f"Significant heading change at row {i}: {prev_heading}° -> {heading}° (Δ{heading_change:.1f}°)")
-                    prev_heading = heading
-
-                    # Compute the local quaternion from Euler angles (converted to ENU yaw)
-                    if i < debug_detail_limit:
-                        print("Computing local quaternion from Euler angles")
-                    q_local = euler_to_quaternion(heading, pitch, roll)
-
-                    # Apply any model correction (currently identity)
-                    if i < debug_detail_limit:
-                        print("Applying model correction quaternion")
-                    q_local_corrected = quaternion_multiply(model_correction, q_local)
-                    if i < debug_detail_limit:
-                        print(f"Corrected local quaternion: [{q_local_corrected[0]:.6f}, {q_local_corrected[1]:.6f}, {q_local_corrected[2]:.6f}, {q_local_corrected[3]:.6f}]")
-
-                    # Compute ENU-to-ECEF transformation matrix and corresponding quaternion
-                    if i < debug_detail_limit:
-                        print(f"Computing ENU to ECEF transformation matrix for UTM_X={utm_x}, UTM_Y={utm_y}")
-                    enu_matrix = enu_to_ecef_matrix(utm_x, utm_y, utm_to_geodetic_transformer)
-                    if i < debug_detail_limit:
-                        print(f"ENU matrix: {enu_matrix}")
-                    q_transform = matrix_to_quaternion(enu_matrix)
-                    if i < debug_detail_limit:
-                        print(f"ENU to ECEF quaternion: [{q_transform[0]:.6f}, {q_transform[1]:.6f}, {q_transform[2]:.6f}, {q_transform[3]:.6f}]")
-
-                    # Get final global quaternion (ECEF) for this row
-                    q_global = quaternion_multiply(q_transform, q_local_corrected)
-                    if i < debug_detail_limit:
-                        print(f"Final ECEF quaternion: [{q_global[0]:.6f}, {q_global[1]:.6f}, {q_global[2]:.6f}, {q_global[3]:.6f}]")
-                        print(f"--- END DETAILED DEBUG FOR ROW {i} ---\n")
-
-                    orientation_list.extend([offset_sec] + q_global)
-
-                    if i % 1000 == 0:
-                        print(f"Row {i}: Heading={heading}°, Pitch={pitch}°, Roll={roll}°, " +
-                              f"Quaternion=[{q_global[0]:.3f}, {q_global[1]:.3f}, {q_global[2]:.3f}, {q_global[3]:.3f}] " +
-                              f"at offset {offset_sec:.2f}s")
-                except Exception as e:
-                    print(f"Error processing orientation at row {i}: {e}")
+    # Rows with a non-empty timestamp that failed to parse are reported once and
+    # get neither sensor nor event packets
+    has_timestamp = timestamp_strings != ""
+    bad_timestamps = np.isnat(timestamps)
+    for i in np.flatnonzero(has_timestamp & bad_timestamps):
+        log.error("Error parsing timestamp at row %d: %r", i, timestamp_strings[i])
+    labelled = has_timestamp & ~bad_timestamps
+
+    # Sample columns as float64 arrays (missing values are NaN); Pitch/Roll default to 0 if not present
+    utm_x = get_column(data, "UTM_X", np.nan)
+    utm_y = get_column(data, "UTM_Y", np.nan)
+    depth = get_column(data, "Depth", np.nan)
+    heading = get_column(data, "Heading", np.nan)
+    pitch = get_column(data, "Pitch", 0.0)
+    roll = get_column(data, "Roll", 0.0)
+
+    # Only rows with a UTM position and depth produce samples (depth is negative below sea level)
+    valid = ~(np.isnan(utm_x) | np.isnan(utm_y) | np.isnan(depth))
+    rows = np.flatnonzero(valid)
+    utm_x, utm_y, depth = utm_x[rows], utm_y[rows], depth[rows]
+    heading, pitch, roll = heading[rows], pitch[rows], roll[rows]
+    offsets = offsets_all[rows]
+    for k in np.flatnonzero(np.isnan(offsets)):
+        log.error("Error parsing timestamps at row %d: %r -> %r", rows[k], start_time, timestamp_strings[rows[k]])
+    offsets[np.isnan(offsets)] = 0
+
+    # Convert UTM coordinates to ECEF (used for the CZML 'position' property)
+    xyz = utm_to_cartesian(utm_x, utm_y, depth, utm_to_ecef_transformer)
+    position_list = np.column_stack([offsets, xyz]).ravel()  # [time, x, y, z] in ECEF
+
+    # ENU-to-ECEF quaternion for every sample
+    q_transform = enu_to_ecef_quaternion(utm_x, utm_y, utm_to_geodetic_transformer)
+
+    # Local quaternion from Euler angles (converted to ENU yaw), with the
+    # model correction applied, transformed to ECEF. Multiplying by the
+    # identity correction is a no-op, so it is skipped in that case.
+    q_local = euler_to_quaternion(heading, pitch, roll)
+    if not np.array_equal(model_correction, IDENTITY_QUATERNION):
+        q_local = quaternion_multiply(model_correction, q_local)
+    q_global = quaternion_multiply(q_transform, q_local)
+
+    # For the first 20 rows, force level flight (orientation pointing north):
+    # the local quaternion is identity, so the global one is just the ENU-to-ECEF transform
+    forced = rows < 20
+    q_global[forced] = q_transform[forced]
+    if forced.any():
+        log.info("Forcing level flight pointing north for rows %d-%d", rows[forced][0], rows[forced][-1])
+
+    has_heading = ~np.isnan(heading)
+    has_attitude = has_heading & ~np.isnan(pitch) & ~np.isnan(roll)
+    # One summary line per kind of gap; the individual rows are only listed with --verbose
+    missing_heading = rows[~forced & ~has_heading]
+    missing_attitude = rows[~forced & has_heading & ~has_attitude]
+    if missing_heading.size:
+        log.warning("Warning: Missing heading data at %d rows; no orientation for these rows", missing_heading.size)
+    if missing_attitude.size:
+        log.error("Error processing orientation at %d rows: missing pitch/roll", missing_attitude.size)
+    if log.isEnabledFor(logging.DEBUG):
+        for i in missing_heading:
+            log.debug("Missing heading data at row %d", i)
+        for i in missing_attitude:
+            log.debug("Missing pitch/roll at row %d", i)
+
+    oriented = forced | has_attitude
+    # float32 is plenty for unit quaternions (Cesium renders rotations in single
+    # precision) and roughly halves the encoded size; offsets are whole seconds,
+    # exact in float32 for dives up to ~194 days. Positions stay float64.
+    orientation_list = np.column_stack([offsets[oriented], q_global[oriented]]).astype(np.float32).ravel()  # [time, qx, qy, qz, qw] in ECEF
+
+    # The remaining diagnostics only matter with --verbose, so skip them entirely otherwise
+    if log.isEnabledFor(logging.DEBUG):
+        # Report significant heading changes between consecutive oriented samples
+        normal = oriented & ~forced
+        normal_rows = rows[normal]
+        normal_headings = heading[normal]
+        heading_change = np.abs(np.diff(normal_headings))
+        heading_change = np.minimum(heading_change, 360 - heading_change)
+        for k in np.flatnonzero(heading_change > 30):
+            log.debug("Significant heading change at row %d: %s° -> %s° (Δ%.1f°)",
+                      normal_rows[k + 1], normal_headings[k], normal_headings[k + 1], heading_change[k])
+
+        for k in np.flatnonzero(oriented)[:debug_detail_limit]:
+            if forced[k]:
+                # The applied local rotation is the identity, not the Euler-derived q_local
+                log.debug("\n--- SPECIAL HANDLING FOR ROW %d: FORCING LEVEL FLIGHT NORTH ---", rows[k])
+                log.debug("North-pointing local quaternion: [%.6f, %.6f, %.6f, %.6f]", *IDENTITY_QUATERNION)
             else:
-                print(f"Warning: Missing heading data at row {i}")
-
-    if not position_list:
-        print("No valid position data found. Returning document-only CZML.")
-        return [document_packet]
+                log.debug("\n--- DETAILED DEBUG FOR ROW %d ---", rows[k])
+                log.debug("Raw values: Heading=%s°, Pitch=%s°, Roll=%s°", heading[k], pitch[k], roll[k])
+                log.debug("Corrected local quaternion: [%.6f, %.6f, %.6f, %.6f]", *q_local[k])
+            log.debug("ENU to ECEF quaternion: [%.6f, %.6f, %.6f, %.6f]", *q_transform[k])
+            log.debug("Final ECEF quaternion: [%.6f, %.6f, %.6f, %.6f]", *q_global[k])
+            log.debug("--- END DETAILED DEBUG FOR ROW %d ---\n", rows[k])
+
+        for k in np.flatnonzero(normal & (rows % 1000 == 0)):
+            log.debug("Row %d: Heading=%s°, Pitch=%s°, Roll=%s°, Quaternion=[%.3f, %.3f, %.3f, %.3f] at offset %.2fs",
+                      rows[k], heading[k], pitch[k], roll[k], *q_global[k], offsets[k])
+
+    if not position_list.size:
+        log.warning("No valid position data found. Returning document-only CZML.")
+        return
 
     # Build the main Hercules (ROV) CZML packet with path, position, and orientation
     hercules_packet = {
@@ -485,7 +561,7 @@ def build_czml(data):
         "path": {
             "show": [{"interval": f"{start_time}/{end_time}", "boolean": True}],
             "width": 2,
-            "material": {"solidColor": {"color": {"rgba": [255, 255, 255, 255]}}},
+            "material": {"solidColor": {"color": {"rgba": WHITE_RGBA}}},
             "resolution": 2,
             "leadTime": 999999999.0,
             "trailTime": 999999999.0
@@ -497,114 +573,142 @@ def build_czml(data):
             "cartesian": position_list  # See CZML Guide: https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide#position
         },
         "point": {
-            "color": {"rgba": [0, 255, 255, 255]},
+            "color": {"rgba": CYAN_RGBA},
             "pixelSize": 8,
-            "outlineColor": {"rgba": [0, 0, 0, 255]},
+            "outlineColor": {"rgba": BLACK_RGBA},
             "outlineWidth": 1
         }
     }
 
-    if orientation_list:
+    if orientation_list.size:
         hercules_packet["orientation"] = {
             "epoch": start_time,
             "interpolationAlgorithm": "LINEAR",
             "unitQuaternion": orientation_list  # See CZML Guide: https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Guide#orientation
         }
-        print(f"Generated {len(orientation_list) // 5} orientation samples.")
+        log.info("Generated %d orientation samples.", len(orientation_list) // 5)
     else:
-        print("Warning: No heading data was found; orientation will be omitted.")
-
-    czml = [document_packet, hercules_packet]
+        log.warning("Warning: No heading data was found; orientation will be omitted.")
+
+    yield hercules_packet
+
+    # Sensor and event packets (using Cesium LabelGraphics and BillboardGraphics)
+    # are generated lazily here and written out one at a time.
+
+    # Sensor labels are only added for every 5th row that has O2 and temperature readings
+    o2 = get_column(data, "O2_Concentration", np.nan)
+    temp = get_column(data, "Temperature", np.nan)
+    sensor_names = get_column(data, "sensor_name", "Sensor")
+    sensor_rows = np.arange(0, len(data), 5)
+    sensor_rows = sensor_rows[labelled[sensor_rows] & ~np.isnan(o2[sensor_rows]) & ~np.isnan(temp[sensor_rows])]
+    for i in sensor_rows:
+        sensor_name = sensor_names[i]
+        yield {
+            "id": f"{sensor_name}_{i}",
+            "parent": "Hercules",
+            "availability": f"{timestamp_strings[i]}/{end_times[i]}Z",
+            "position": HERCULES_POSITION_REF,
+            "Data": {
+                "text": f"{sensor_name}",
+                "Oxygen": f"{o2[i]:.2f} mgL",
+                "Tempertature": f"{temp[i]:.2f}°C",
+                "Comments": ""
+            }
+        }
 
-    # Generate sensor and event packets (using Cesium LabelGraphics and BillboardGraphics)
-    for i, row in enumerate(data):
-        timestamp = row.get("Timestamp")
-        if not timestamp:
+    # Event billboards and labels, for rows with an event type and an image
+    event_types = get_column(data, "event_value", "")
+    image_paths = get_column(data, "vehicleRealtimeDualHDGrabData.filename_2_value", "")
+    event_texts = get_column(data, "event_free_text", "")
+    for i in np.flatnonzero(labelled & (event_types != "") & (image_paths != "")):
+        event_type = event_types[i].strip()
+        if not event_type:
             continue
+        rgba, scale = EVENT_STYLES.get(event_type, DEFAULT_EVENT_STYLE)
+
+        timestamp = timestamp_strings[i]
+        safe_time = timestamp.translate(SAFE_TIME_TABLE)
+        yield {
+            "id": f"Event_{event_type}_{safe_time}",
+            "parent": "Hercules",
+            "availability": f"{timestamp}/{end_times[i]}Z",
+            "position": HERCULES_POSITION_REF,
+            "billboard": {**EVENT_BILLBOARD_TEMPLATE, "scale": scale, "image": image_paths[i],
+                          "color": {"rgba": rgba}},
+            "label": {**EVENT_LABEL_TEMPLATE, "text": event_texts[i]}
+        }
 
-        dt_start = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
-        dt_end = dt_start + timedelta(seconds=2)
-        availability_str = f"{timestamp}/{dt_end.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-
-        # Every 5th row add sensor label
-        if i % 5 == 0:
-            o2 = row.get("O2_Concentration")
-            temp = row.get("Temperature")
-            if o2 is not None and temp is not None:
-                sensor_name = row.get("sensor_name", "Sensor")
-                sensor_id = f"{sensor_name}_{i}"
-                sensor_packet = {
-                    "id": sensor_id,
-                    "parent": "Hercules",
-                    "availability": availability_str,
-                    "position": {"reference": "Hercules#position"},
-                    "Data": {
-                        "text": f"{sensor_name}",
-                        "Oxygen": f"{o2:.2f} mgL",
-                        "Tempertature": f"{temp:.2f}°C",
-                        "Comments": f"{}"
-                    }
-                }
-                czml.append(sensor_packet)
-
-        # Handle event data if present (adding billboard and label)
-        if row.get("event_value") and row["event_value"].strip():
-            event_type = row["event_value"].strip()
-            event_text = row.get("event_free_text", "")
-            image_path = row.get("vehicleRealtimeDualHDGrabData.filename_2_value", "")
-            if not image_path:
-                continue
-
-            if event_type == "FREE_FORM":
-                rgba = [0, 100, 0, 179]
-                scale = 0.5
-            elif event_type == "HIGHLIGHT":
-                rgba = [184, 134, 11, 179]
-                scale = 0.6
-            else:
-                rgba = [255, 255, 255, 179]
-                scale = 0.5
-
-            safe_time = timestamp.replace(":", "").replace("-", "").replace("T", "_")
-            event_id = f"Event_{event_type}_{safe_time}"
-            event_packet = {
-                "id": event_id,
-                "parent": "Hercules",
-                "availability": availability_str,
-                "position": {"reference": "Hercules#position"},
-                "billboard": {
-                    "scale": scale,
-                    "horizontalOrigin": "RIGHT",
-                    "eyeOffset": {"cartesian": [0, 0, 0]},
-                    "image": image_path,
-                    "show": True,
-                    "pixelOffset": {"cartesian2": [0, 0]},
-                    "verticalOrigin": "CENTER",
-                    "distanceDisplayCondition": {"distanceDisplayCondition": [100, 9999999]},
-                    "disableDepthTestDistance": 9999999999,
-                    "color": {"rgba": rgba}
-                },
-                "label": {
-                    "style": "FILL_AND_OUTLINE",
-                    "scale": 0.5,
-                    "horizontalOrigin": "LEFT",
-                    "show": True,
-                    "text": event_text,
-                    "disableDepthTestDistance": 9999999999,
-                    "pixelOffset": {"cartesian2": [5, -50]},
-                    "fillColor": {"rgba": [255, 255, 255, 255]},
-                    "verticalOrigin": "CENTER",
-                    "font": "bold 15pt Calibri",
-                    "distanceDisplayCondition": {"distanceDisplayCondition": [100, 9999999]},
-                    "outlineWidth": 2,
-                    "outlineColor": {"rgba": [0, 0, 0, 255]}
-                }
-            }
-            czml.append(event_packet)
+def _numpy_to_list(obj):
+    """json.dumps fallback that converts NumPy arrays to plain lists."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _write_packets(packets, path, minify):
+    """Encode `packets` into a JSON array at `path` (see write_czml)."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY if minify else orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        with path.open("wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(b"[\n")
+            for i, packet in enumerate(packets):
+                if i:
+                    f.write(b",\n")
+                f.write(orjson.dumps(packet, option=option))
+            f.write(b"\n]\n")
+        return
+
+    dumps_kwargs = {"separators": (",", ":")} if minify else {"indent": 2}
+    with path.open("w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write("[\n")
+        for i, packet in enumerate(packets):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(packet, default=_numpy_to_list, **dumps_kwargs))
+        f.write("\n]\n")
+
+def write_czml(packets, output_file, minify=False):
+    """
+    Write CZML packets to output_file as a JSON array, one packet at a time.
+
+    Packets are pretty-printed with a 2-space indent unless `minify` is set,
+    in which case each packet is written on a single line without extra
+    whitespace (smaller file, faster to write and to load in Cesium).
+
+    Each packet is encoded and written as soon as it is taken from `packets`
+    (any iterable), so only a single encoded packet is held in memory
+    instead of the whole document. The packets go to a sibling '.part' file
+    that replaces output_file only once the whole array has been written; if
+    building or writing a packet fails, the '.part' file is removed and the
+    error is re-raised, so no truncated CZML is left behind.
+
+    Packets are encoded with orjson when it is installed; it serializes the
+    NumPy sample arrays from iter_czml_packets directly. Otherwise the standard json
+    module is used and the arrays are converted to lists.
 
-    return czml
+    Reference: a CZML document is a JSON array of packets, see
+    https://github.com/AnalyticalGraphicsInc/czml-writer/wiki/CZML-Structure
+    """
+    output_file = Path(output_file)
+    part_file = output_file.with_name(output_file.name + ".part")
+    try:
+        _write_packets(packets, part_file, minify)
+        part_file.replace(output_file)
+    except BaseException:
+        part_file.unlink(missing_ok=True)
+        raise
 
 def main():
+    parser = argparse.ArgumentParser(description="Convert an ROV dive CSV into a CZML document for CesiumJS.")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print progress and per-row orientation diagnostics")
+    parser.add_argument("--minify", action="store_true",
+                        help="write compact CZML without indentation")
+    args = parser.parse_args()
+    # Only this script's logger goes to DEBUG; third-party libraries stay at WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    if args.verbose:
+        log.setLevel(logging.DEBUG)
+
     # 1) CSV path
     default_csv = r"E:\RUMI\NAUTILUS-CRUISE-COPY2\NA156\RUMI_processed\H2021\NA156_H2021_filtered_offset_final.csv"
     csv_in = input(f"CSV input file path? [default: {default_csv}]: ").strip()
@@ -631,7 +735,7 @@ def main():
     print(f"Will generate CZML to: {output_file}")
 
     data = parse_csv(csv_in)
-    if not data:
+    if data.empty:
         print("No data parsed from CSV. Exiting.")
         return
 
@@ -642,29 +746,40 @@ def main():
             end_idx = int(input(f"Enter the end row index (1 to {len(data)}): "))
             if 0 <= start_idx < end_idx <= len(data):
                 print(f"Subsetting data from rows {start_idx} through {end_idx - 1}")
-                data = data[start_idx:end_idx]
+                data = data.iloc[start_idx:end_idx]
             else:
                 print("Invalid range; using full dataset instead.")
         except ValueError:
             print("Invalid input; using full dataset instead.")
 
-    czml_list = build_czml(data)
-    if not czml_list:
-        print("Failed to build CZML. Exiting.")
-        return
-
+    # Packets are streamed straight from iter_czml_packets into the output file,
+    # then that file is copied next to the CSV instead of being encoded twice.
+    # Packets are built while they are written, so an OSError means the output
+    # file could not be written (the copy is then written directly instead);
+    # anything else was raised while building them and would fail again.
+    written = False
     try:
-        with output_file.open("w", encoding="utf-8") as f:
-            json.dump(czml_list, f, indent=2)
+        write_czml(iter_czml_packets(data), output_file, minify=args.minify)
+        written = True
         print(f"CZML file successfully created: {output_file}")
-    except Exception as e:
+    except OSError as e:
         print(f"Error writing CZML file: {e}")
+    except Exception as e:
+        print(f"Failed to build CZML: {e}")
+        return
 
     csv_input_dir = Path(csv_in).parent
     copy_file = csv_input_dir / f"{expedition}_{dive_name_input}_{now_str}.czml"
+    if copy_file.resolve() == output_file.resolve():
+        # Either the file is already there, or writing it just failed; don't write it again
+        if written:
+            print(f"Output directory is the CSV directory; no separate copy needed: {copy_file}")
+        return
     try:
-        with copy_file.open("w", encoding="utf-8") as f:
-            json.dump(czml_list, f, indent=2)
+        if written:
+            shutil.copyfile(output_file, copy_file)
+        else:
+            write_czml(iter_czml_packets(data), copy_file, minify=args.minify)
         print(f"Copy of CZML file successfully created in CSV directory: {copy_file}")
     except Exception as e:
         print(f"Error writing copy of CZML file: {e}")
@@ -0,0 +1,47 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# The script's file name is not a valid module name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "czml_writer", Path(__file__).resolve().parent.parent / "main_czml-writer.py"
+)
+czml_writer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(czml_writer)
+
+GOOD = "2023-11-01T19:07:12Z"
+GOOD_PARSED = np.datetime64("2023-11-01T19:07:12", "s")
+
+
+class ParseTimestampColumnTest(unittest.TestCase):
+    def assert_rejected(self, bad):
+        parsed = czml_writer.parse_timestamp_column([GOOD, bad, ""])
+        self.assertEqual(parsed.dtype, np.dtype("datetime64[s]"))
+        self.assertEqual(parsed[0], GOOD_PARSED)
+        self.assertTrue(np.isnat(parsed[1]), f"{bad!r} parsed as {parsed[1]}")
+        self.assertTrue(np.isnat(parsed[2]))
+
+    def test_well_formed_column(self):
+        parsed = czml_writer.parse_timestamp_column([GOOD, "", None, "2023-11-01T19:07:14Z"])
+        self.assertEqual(parsed[0], GOOD_PARSED)
+        self.assertTrue(np.isnat(parsed[1]))
+        self.assertTrue(np.isnat(parsed[2]))
+        self.assertEqual(parsed[3], GOOD_PARSED + np.timedelta64(2, "s"))
+
+    def test_date_without_time(self):
+        self.assert_rejected("2023-11-01")
+
+    def test_fractional_seconds(self):
+        self.assert_rejected("2023-11-01T19:07:12.5Z")
+
+    def test_utc_offset(self):
+        self.assert_rejected("2023-11-01T19:07:12+05:00")
+
+    def test_nat_literal(self):
+        self.assert_rejected("NaT")
+
+
+if __name__ == "__main__":
+    unittest.main()